@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Portfolio optimization code for the paper:
+
+D. Petturiti and B. Vantaggi.
+The impact of ambiguity on dynamic portfolio selection in the
+epsilon-contaminated binomial market model.
+European Journal of Operational Research, 314(3):1029–1039, 2024.
+"""
+"""
+EXPLANATION OF THE CODE:
+Re-optimization of the CEU-optimal final wealth at every node (t, k) of the
+recombining binomial lattice, where t is the time and k the number of "up"
+moves up to t. At every node the problem is solved again with the remaining
+time horizon T - t and with the wealth carried forward by the final wealth
+chosen at time 0, that is the Q-expectation of the final wealth conditional
+on the node, discounted over T - t periods.
+
+By the homogeneity of the CRRA utility, the optimal final wealth for an
+initial wealth W is W times the optimal final wealth for a unit initial
+wealth, so a single solve for each remaining time horizon is enough: the
+T + 1 unit plans are shared by all the nodes with the same remaining time
+horizon and are kept only for the duration of a call. The parameters are as in
+CEU_portfolio.py (p can be a BinomialMarket), and solver is any of the
+solvers therein.
+"""
+
+import scipy.special
+import numpy as np
+import CEU_portfolio as ceu
+
+# Log of the optimal final wealth and CEU for a unit initial wealth, for
+# every remaining time horizon h = 0, ..., T. The solver is asked for log(V),
+# which stays finite when V overflows for large T.
+def unit_plans(p, u=None, d=None, r=None, gamma=None, epsilon=None, T=None, solver=ceu.CEU_port_dual):
+    market = ceu.as_market(p, u, d, r, epsilon, T)
+    plans = {}
+    for h in range(market.T + 1):
+        plans[h] = solver(market.horizon(h), 1, gamma=gamma, log_wealth=True)
+    return plans
+
+# Amount invested in the stock at the first period of the unit plans, for
+# every remaining time horizon h = 1, ..., T: the plan is worth Wu or Wd after
+# an "up" or a "down" move, and is replicated by (Wu - Wd) / (u - d) in the
+# stock and the rest in the riskless asset
+def unit_holdings(market, plans):
+    H = np.full(market.T + 1, np.nan)
+    for h in range(1, market.T + 1):
+        logV = plans[h][0]
+        logQ = market.horizon(h - 1).logQ
+        Wu = np.exp(scipy.special.logsumexp(logQ + logV[1:]) - (h - 1) * np.log(1 + market.r))
+        Wd = np.exp(scipy.special.logsumexp(logQ + logV[:-1]) - (h - 1) * np.log(1 + market.r))
+        H[h] = (Wu - Wd) / (market.u - market.d)
+    return H
+
+# Log of the wealth carried forward at every node (t, k) by the final wealth
+# with logarithm logV. The backward induction is carried out in log-space, so
+# that W[0, 0] = V0 even when the final wealth overflows in extreme states.
+def carried_wealth(logV, market):
+    T = len(logV) - 1
+    q = market.q
+
+    # Backward induction on the lattice: W[t, k] = (q * W[t + 1, k + 1] +
+    # (1 - q) * W[t + 1, k]) / (1 + r), NaN above the diagonal
+    logW = np.full((T + 1, T + 1), np.nan)
+    logW[T, :] = logV
+    for t in range(T - 1, -1, -1):
+        logW[t, :t + 1] = np.logaddexp(np.log(q) + logW[t + 1, 1:t + 2], np.log(1 - q) + logW[t + 1, :t + 1]) - np.log(1 + market.r)
+    return logW
+
+# Re-optimized final wealth at node (t, k) from the unit plans
+def node_plan(W, plans, t, k):
+    T = W.shape[0] - 1
+    with np.errstate(over='ignore', divide='ignore'):
+        return np.exp(np.log(W[t, k]) + plans[T - t][0])
+
+# Re-optimization at every node of the lattice. Returns the wealth lattice W,
+# the lattice of the re-optimized CEU values, the lattice H of the amounts
+# invested in the stock by the re-optimized plans (W - H in the riskless
+# asset, NaN at time T) and the unit plans, from which node_plan gives the
+# re-optimized final wealth at every node. For large T the wealth of the
+# extreme nodes close to time T can exceed the floating point range and is
+# inf there, together with the corresponding entries of H and, for gamma <= 1,
+# of the CEU lattice.
+def CEU_lattice(p, V0, u=None, d=None, r=None, gamma=None, epsilon=None, T=None, solver=ceu.CEU_port_dual):
+    market = ceu.as_market(p, u, d, r, epsilon, T)
+    T = market.T
+    plans = unit_plans(market, gamma=gamma, solver=solver)
+
+    # Wealth carried forward by the final wealth chosen at time 0
+    logW = carried_wealth(np.log(V0) + plans[T][0], market)
+    with np.errstate(over='ignore'):
+        W = np.exp(logW)
+
+    # Holdings and CEU scale with the wealth at the node:
+    # CEU(W * V) = W^(1 - gamma) * CEU(V), or log(W) + CEU(V) if gamma = 1
+    Hu = unit_holdings(market, plans)
+    H = np.full((T + 1, T + 1), np.nan)
+    CEUS = np.full((T + 1, T + 1), np.nan)
+    with np.errstate(over='ignore'):
+        for t in range(T + 1):
+            H[t, :t + 1] = W[t, :t + 1] * Hu[T - t]
+            if gamma == 1:
+                CEUS[t, :t + 1] = logW[t, :t + 1] + plans[T - t][1]
+            else:
+                CEUS[t, :t + 1] = np.exp((1 - gamma) * logW[t, :t + 1]) * plans[T - t][1]
+
+    return (W, CEUS, H, plans)
+
+# Dynamic inconsistency at every node: maximum relative deviation of the
+# re-optimized final wealth from the continuation of the final wealth chosen
+# at time 0, computed from the logarithms (NaN where W is inf)
+def inconsistency(W, plans):
+    T = W.shape[0] - 1
+    logW = np.log(W)
+    D = np.full((T + 1, T + 1), np.nan)
+    for t in range(T + 1):
+        for k in range(t + 1):
+            log_dev = logW[t, k] + plans[T - t][0] - logW[T, k:k + T - t + 1]
+            D[t, k] = np.max(np.abs(np.expm1(log_dev)))
+    return D
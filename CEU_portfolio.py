@@ -24,55 +24,156 @@ IMPORTANT: The code requires the bonmin solver, whose path should be inserted
 in the variable optimizer_path.
 """
 
-import pyomo.environ as pyo
 import scipy.special
+import scipy.stats
 import numpy as np
 
+# pyomo is only needed by CEU_port_nonlin
+try:
+    import pyomo.environ as pyo
+except ImportError:
+    pyo = None
+
 tolerance = 0
 
 optimizer_path = 'PATH_TO_BONMIN'
 
+##############################################################################
+# BINOMIAL MARKET
+##############################################################################
+# Binomial market with T periods, contaminated with parameter epsilon. The
+# probabilities are computed lazily as read-only arrays indexed by the number
+# k of "up" moves and kept in a cache shared by all the contaminated views of
+# the same market. Every solver accepts a BinomialMarket in place of p, in
+# which case u, d, r and T are taken from the market (explicit values that
+# differ from it raise a ValueError, horizon(T) gives the market over another
+# time horizon) and epsilon, if given, selects a contaminated view.
+class BinomialMarket:
+    __slots__ = ('p', 'u', 'd', 'r', 'T', 'q', 'epsilon', '_cache', '_P_pi')
+
+    def __init__(self, p, u, d, r, T, epsilon=0):
+        self.p = p
+        self.u = u
+        self.d = d
+        self.r = r
+        self.T = T
+        # Risk-neutral probability
+        self.q = ((1 + r) - d) / (u - d)
+        self.epsilon = epsilon
+        self._cache = {}
+        self._P_pi = None
+
+    # View of the same market contaminated with a new epsilon, sharing the
+    # cached probabilities
+    def contaminated(self, epsilon):
+        view = BinomialMarket.__new__(BinomialMarket)
+        for name in ('p', 'u', 'd', 'r', 'T', 'q', '_cache'):
+            setattr(view, name, getattr(self, name))
+        view.epsilon = epsilon
+        view._P_pi = None
+        return view
+
+    # Same market under the risk-neutral probability, i.e., with p = q
+    def neutral(self):
+        return BinomialMarket(self.q, self.u, self.d, self.r, self.T, self.epsilon)
+
+    # Same market over a different time horizon T
+    def horizon(self, T):
+        return BinomialMarket(self.p, self.u, self.d, self.r, T, self.epsilon)
+
+    def _cached(self, name, compute):
+        if not name in self._cache:
+            x = compute()
+            x.flags.writeable = False
+            self._cache[name] = x
+        return self._cache[name]
+
+    # Log-probabilities of P
+    @property
+    def logP(self):
+        return self._cached('logP', lambda: scipy.stats.binom.logpmf(np.arange(self.T + 1), self.T, self.p))
+
+    # Log-probabilities of Q
+    @property
+    def logQ(self):
+        return self._cached('logQ', lambda: scipy.stats.binom.logpmf(np.arange(self.T + 1), self.T, self.q))
+
+    @property
+    def P(self):
+        return self._cached('P', lambda: np.exp(self.logP))
+
+    @property
+    def Q(self):
+        return self._cached('Q', lambda: np.exp(self.logQ))
+
+    # Likelihood ratios Q[k] / P[k] and their logarithms
+    @property
+    def logLR(self):
+        return self._cached('logLR', lambda: self.logQ - self.logP)
+
+    @property
+    def LR(self):
+        return self._cached('LR', lambda: np.exp(self.logLR))
+
+    # Extreme points of the epsilon-contamination, P_pi[i, k] = (1 - epsilon)
+    # * P[k] + epsilon * (i == k), computed for the current view only
+    @property
+    def P_pi(self):
+        if self._P_pi is None:
+            P_pi = np.tile((1 - self.epsilon) * self.P, (self.T + 1, 1))
+            P_pi[np.diag_indices(self.T + 1)] += self.epsilon
+            P_pi.flags.writeable = False
+            self._P_pi = P_pi
+        return self._P_pi
+
+    # Capitalized initial wealth
+    def capitalized(self, V0):
+        return V0 * (1 + self.r) ** self.T
+
+# Market of the solvers' arguments
+def as_market(p, u, d, r, epsilon, T):
+    if isinstance(p, BinomialMarket):
+        for name, x in (('u', u), ('d', d), ('r', r), ('T', T)):
+            if x is not None and x != getattr(p, name):
+                raise ValueError('{} = {} conflicts with the market ({} = {})'.format(name, x, name, getattr(p, name)))
+        if epsilon is None or epsilon == p.epsilon:
+            return p
+        return p.contaminated(epsilon)
+    return BinomialMarket(p, u, d, r, T, 0 if epsilon is None else epsilon)
+
 ##############################################################################
 # NON-LINEAR PROGRAMMING SOLUTION
 ##############################################################################
 # Portfolio optimization with non-linear programming
-def CEU_port_nonlin(p, V0, u, d, r, gamma, epsilon, T):
+def CEU_port_nonlin(p, V0, u=None, d=None, r=None, gamma=None, epsilon=None, T=None, return_path=False, log_wealth=False):
+    if pyo is None:
+        raise ImportError('CEU_port_nonlin requires pyomo')
+    market = as_market(p, u, d, r, epsilon, T)
+    r, epsilon, T = market.r, market.epsilon, market.T
+
+    # Degenerate regimes are solved in closed form
+    sol = CEU_port_closed(market, V0, gamma=gamma, log_wealth=log_wealth)
+    if sol is not None:
+        return sol if return_path else sol[:2]
+
     # Create a PyOmo model
     model = pyo.ConcreteModel()
 
     # Indices of optimization variables
     N = list(range(1,T + 2))
     
-    # Risk-neutral probability
-    q = ((1 + r) - d) / (u - d)
-    
     # Utility function
     def u(x):
         if gamma == 1:
             return pyo.log(x)
         return x ** (1 - gamma) / (1 - gamma)
 
-    # Generate the P probabilities
-    P = {}
-    for i in N:
-        k = T - (i - 1)
-        P[i] = scipy.special.comb(T, k) * p**k * (1-p)**(T - k)
-
-    # Generate the Q probabilities
-    Q = {}
-    for i in N:
-        k = T - (i - 1)
-        Q[i] = scipy.special.comb(T, k) * q**k * (1-q)**(T - k)
-    
-    
-    # Generate the permuted P probabilities
-    PP = {}
-    for i in N:
-        for j in N:
-            if i == j:
-                PP[i,j] = (1 - epsilon) * P[j] + epsilon
-            else:
-                PP[i,j] = (1 - epsilon) * P[j]
+    # The index i corresponds to k = T - (i - 1) "up" moves
+    def PP(model, i, j):
+        return market.P_pi[T - (i - 1), T - (j - 1)]
+
+    def Q(model, i):
+        return market.Q[T - (i - 1)]
     
     model.N = pyo.Set(initialize=N)
 
@@ -101,8 +202,12 @@ def CEU_port_nonlin(p, V0, u, d, r, gamma, epsilon, T):
     
     # Create an array and revert the order
     V = np.array(V)[::-1]
+    if log_wealth:
+        V = np.log(V)
         
     # Return the optimal solution and the optimal CEU value
+    if return_path:
+        return (V, pyo.value(model.o), 'nonlin')
     return (V, pyo.value(model.o))
 
 
@@ -170,28 +275,21 @@ def good_V(T, first, V):
     return True
         
 # Portfolio optimization with combinatorial optimization
-def CEU_port_comb(p, V0, u, d, r, gamma, epsilon, T):
-    # Risk-neutral probability
-    q = ((1 + r) - d) / (u - d)
-    
+def CEU_port_comb(p, V0, u=None, d=None, r=None, gamma=None, epsilon=None, T=None, return_path=False, log_wealth=False):
+    market = as_market(p, u, d, r, epsilon, T)
+    r, T = market.r, market.T
+
+    # Degenerate regimes are solved in closed form
+    sol = CEU_port_closed(market, V0, gamma=gamma, log_wealth=log_wealth)
+    if sol is not None:
+        return sol if return_path else sol[:2]
+
     # Create the index set
     Theta = set(range(T + 1))
     
-    # Generate P probabilities
-    P = np.zeros(T + 1)
-    for k in range(T + 1):
-        P[k] = scipy.special.comb(T, k) * p**k * (1-p)**(T - k)
-    
-    # Generate Q probabilities
-    Q = np.zeros(T + 1)
-    for k in range(T + 1):
-        Q[k] = scipy.special.comb(T, k) * q**k * (1-q)**(T - k)
-    
-    # Generate the extreme points of the epsilon-contamination
-    P_pi = np.zeros((T + 1, T + 1))
-    for i in range(T + 1):
-        P_pi[i, :] = (1 - epsilon) * P
-        P_pi[i, i] += epsilon
+    # Q probabilities and extreme points of the epsilon-contamination
+    Q = market.Q
+    P_pi = market.P_pi
 
 
     CEUS = []
@@ -246,4 +344,128 @@ def CEU_port_comb(p, V0, u, d, r, gamma, epsilon, T):
     i_max = np.argmax(CEUS)
     V_max = VS[i_max]
             
-    return (V_max, max_CEU)
\ No newline at end of file
+    if log_wealth:
+        V_max = np.log(V_max)
+    if return_path:
+        return (V_max, max_CEU, 'comb')
+    return (V_max, max_CEU)
+
+
+##############################################################################
+# CLOSED-FORM SOLUTION OF DEGENERATE REGIMES
+##############################################################################
+# Threshold on epsilon above which the riskless final wealth is optimal:
+# the constant wealth is optimal iff Q >= (1 - epsilon) * P, i.e., iff
+# epsilon >= 1 - min_k Q[k] / P[k], where the minimum is attained at k = 0 or
+# k = T. The threshold does not depend on gamma and is 0 for p = q.
+def epsilon_riskless(p, u=None, d=None, r=None, T=None):
+    market = as_market(p, u, d, r, None, T)
+    p, q, T = market.p, market.q, market.T
+    return 1 - np.exp(T * min(np.log(q / p), np.log((1 - q) / (1 - p))))
+
+# Expected utility sum_k pi[k] * U(V[k], gamma) computed from log(pi) and
+# log(V), which stays finite when V overflows in states of tiny probability
+def EU_log(logpi, logV, gamma):
+    if gamma == 1:
+        return np.dot(np.exp(logpi), logV)
+    return np.exp(scipy.special.logsumexp(logpi + (1 - gamma) * logV)) / (1 - gamma)
+
+# Final wealth from its logarithm: log(V) itself if log_wealth, otherwise V,
+# which is inf where it exceeds the floating point range
+def wealth(logV, log_wealth):
+    if log_wealth:
+        return logV
+    with np.errstate(over='ignore'):
+        return np.exp(logV)
+
+# Portfolio optimization in closed form for the degenerate regimes:
+# * 'riskless': epsilon >= epsilon_riskless (this includes p = q), the optimal
+#   final wealth is the capitalized initial wealth in every state
+# * 'eu': epsilon = 0, classical expected utility with
+#   V[k] = U_p_inv(lambda * Q[k] / P[k]) and lambda fixed by the budget
+# Returns (V, CEU, path) or None if the regime is not degenerate. Every solver
+# tries this first, and with return_path=True also returns the solution path
+# as a third element: 'riskless' or 'eu' if a closed-form fast path applied,
+# otherwise 'nonlin', 'comb' or 'dual'. With log_wealth=True every solver
+# returns log(V) in place of V, which stays finite when V overflows.
+def CEU_port_closed(p, V0, u=None, d=None, r=None, gamma=None, epsilon=None, T=None, log_wealth=False):
+    # gamma is optional in the signature only because it follows u, d and r
+    if gamma is None:
+        raise TypeError('gamma is required')
+    market = as_market(p, u, d, r, epsilon, T)
+    epsilon, T = market.epsilon, market.T
+
+    # Capitalized initial wealth
+    logW = np.log(V0) + T * np.log(1 + market.r)
+
+    if epsilon >= epsilon_riskless(market) - 0.000000001:
+        logV = np.full(T + 1, logW)
+        return (wealth(logV, log_wealth), EU_log(np.zeros(1), logV[:1], gamma), 'riskless')
+
+    if epsilon == 0:
+        logQ = market.logQ
+
+        # V[k] = U_p_inv(lambda * Q[k] / P[k]) with lambda fixed by the
+        # budget, computed in log-space
+        log_ratio = -market.logLR
+        log_c = logW - scipy.special.logsumexp(logQ + log_ratio / gamma)
+        logV = log_c + log_ratio / gamma
+        return (wealth(logV, log_wealth), EU_log(market.logP, logV, gamma), 'eu')
+
+    return None
+
+
+##############################################################################
+# DUAL SOLUTION
+##############################################################################
+# Portfolio optimization by searching the worst mixture of the extreme points
+# of the epsilon-contamination. For a mixture m of the rows of P_pi the inner
+# problem is an expected utility problem under pi = (1 - epsilon) * P +
+# epsilon * m. At the saddle point m is supported on the states of minimum
+# final wealth, so that pi[k] = max(s * Q[k], (1 - epsilon) * P[k]) with the
+# scalar s in [epsilon, 1] fixed by sum_k pi[k] = 1. Every step of the search
+# on s costs O(T), and the computation is carried out in log-space so that
+# large time horizons do not underflow. The CEU is computed from log(V) and
+# is finite even when V[k] exceeds the floating point range (about 1e308) in
+# the extreme states, where the returned V[k] is inf.
+def CEU_port_dual(p, V0, u=None, d=None, r=None, gamma=None, epsilon=None, T=None, iters=100, return_path=False, log_wealth=False):
+    market = as_market(p, u, d, r, epsilon, T)
+    epsilon = market.epsilon
+
+    # Degenerate regimes are solved in closed form
+    sol = CEU_port_closed(market, V0, gamma=gamma, log_wealth=log_wealth)
+    if sol is not None:
+        return sol if return_path else sol[:2]
+
+    logQ = market.logQ
+    logA = np.log(1 - epsilon) + market.logP
+
+    # Bisection on log(s), g(s) = sum_k pi[k] is increasing with
+    # g(epsilon) <= 1 and g(1) >= 1
+    lo = np.log(epsilon)
+    hi = 0
+    for it in range(iters):
+        mid = (lo + hi) / 2
+        if np.exp(np.maximum(mid + logQ, logA)).sum() > 1:
+            hi = mid
+        else:
+            lo = mid
+
+    # Exact value of s on the set of states charged by the worst mixture
+    active = hi + logQ >= logA
+    log_s = np.log(1 - np.exp(logA[~active]).sum()) - np.log(np.exp(logQ[active]).sum())
+
+    # Log-ratios log(pi[k] / Q[k]) of the worst measure pi
+    log_ratio = np.maximum(log_s, logA - logQ)
+
+    # V[k] = U_p_inv(lambda * Q[k] / pi[k]) with lambda fixed by the budget
+    logW = np.log(V0) + market.T * np.log(1 + market.r)
+    log_c = logW - scipy.special.logsumexp(logQ + log_ratio / gamma)
+    logV = log_c + log_ratio / gamma
+
+    # The worst mixture is supported on the states of minimum final wealth
+    CEU = EU_log(logQ + log_ratio, logV, gamma)
+
+    if return_path:
+        return (wealth(logV, log_wealth), CEU, 'dual')
+    return (wealth(logV, log_wealth), CEU)
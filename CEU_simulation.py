@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Portfolio optimization code for the paper:
+
+D. Petturiti and B. Vantaggi.
+The impact of ambiguity on dynamic portfolio selection in the
+epsilon-contaminated binomial market model.
+European Journal of Operational Research, 314(3):1029–1039, 2024.
+"""
+"""
+EXPLANATION OF THE CODE:
+Monte Carlo simulation of the realised final wealth under an optimal final
+wealth V (as a function of the number k of "up" moves) returned by the
+solvers in CEU_portfolio.py, when the true probability of an "up" move
+p_true may differ from the calibrated p. The parameters are
+* V: Optimal final wealth, V[k] for k = 0, ..., T
+* p_true: True probability of an "up" move over a single period
+* gamma: CRRA relative risk aversion parameter
+* epsilon: Ambiguity parameter in [0,1) used for the CEU statistics
+* n_paths: Number of simulated paths
+* chunk: Number of paths drawn in a single batch
+* seed: Seed of the random generator
+* processes: Number of processes the batches are distributed on
+
+The final wealth only depends on the number of "up" moves, so every path is
+drawn as a binomial count and only the counts of the T + 1 states are kept:
+memory is bounded by the size of a batch, whatever the number of paths.
+Every batch has its own seed spawned from seed, so that the results do not
+depend on the number of processes.
+"""
+
+import multiprocessing
+import numpy as np
+import CEU_portfolio as ceu
+
+# Count the number of "up" moves of n paths of length T
+def count_batch(T, p_true, n, seed):
+    rng = np.random.default_rng(seed)
+    K = rng.binomial(T, p_true, size=n)
+    return np.bincount(K, minlength=T + 1)
+
+# Simulate the counts of the number of "up" moves over n_paths paths
+def simulate_counts(T, p_true, n_paths, chunk=1000000, seed=None, processes=1):
+    # Sizes and seeds of the batches
+    sizes = [chunk] * (n_paths // chunk)
+    if n_paths % chunk > 0:
+        sizes.append(n_paths % chunk)
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    seeds = seed.spawn(len(sizes))
+    tasks = [(T, p_true, n, s) for n, s in zip(sizes, seeds)]
+
+    counts = np.zeros(T + 1, dtype=np.int64)
+    if processes > 1:
+        with multiprocessing.Pool(processes) as pool:
+            for c in pool.starmap(count_batch, tasks):
+                counts += c
+    else:
+        for task in tasks:
+            counts += count_batch(*task)
+
+    return counts
+
+# Statistics of the realised final wealth, utility and CEU
+def wealth_stats(V, counts, gamma, epsilon, levels=(0.01, 0.05, 0.5, 0.95, 0.99)):
+    # Empirical distribution of the number of "up" moves
+    F = counts / counts.sum()
+    UV = ceu.U(V, gamma)
+
+    # The sums run on the visited states only, so that the final wealth of
+    # the states never reached (inf for large T) does not give 0 * inf
+    seen = F > 0
+
+    mean = np.dot(F[seen], V[seen])
+    std = np.sqrt(np.dot(F[seen], (V[seen] - mean) ** 2))
+
+    # Quantiles of the final wealth
+    order = np.argsort(V, kind='stable')
+    cum = np.cumsum(F[order])
+    quantiles = {}
+    for a in levels:
+        quantiles[a] = V[order[min(np.searchsorted(cum, a), len(V) - 1)]]
+
+    # Expected utility and CEU under the epsilon-contamination of the
+    # empirical distribution
+    EU = np.dot(F[seen], UV[seen])
+    CEU = (1 - epsilon) * EU + epsilon * UV.min()
+
+    return {'mean': mean, 'std': std, 'quantiles': quantiles, 'EU': EU, 'CEU': CEU}
+
+# Simulate the final wealth V under the alternative probabilities in Probs
+def simulate_wealth(V, Probs, gamma, epsilon, n_paths, chunk=1000000, seed=None, processes=1):
+    T = len(V) - 1
+    # One child seed per alternative probability
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    seeds = seed.spawn(len(Probs))
+    stats = {}
+    for p_true, s in zip(Probs, seeds):
+        counts = simulate_counts(T, p_true, n_paths, chunk, s, processes)
+        stats[p_true] = wealth_stats(V, counts, gamma, epsilon)
+    return stats
+
+# Check on a large time horizon, where the optimal final wealth of the
+# extreme states exceeds the floating point range
+if __name__ == '__main__':
+    T = 10000
+    p = 0.5528455284552846
+    u = 1.0291516607967388
+    d = 0.9716740866218196
+    r = 0.00019822675964520364
+    for gamma in [0.5, 1, 2]:
+        V, CEU = ceu.CEU_port_dual(p, 1000, u, d, r, gamma, 0.02, T)
+        stats = simulate_wealth(V, [0.5, p], gamma, 0.02, 1000000, seed=np.random.SeedSequence(2024))
+        for p_true in stats:
+            assert np.isfinite([stats[p_true][x] for x in ('mean', 'std', 'EU', 'CEU')]).all()
+        print('gamma =', gamma, 'OK')
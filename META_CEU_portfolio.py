@@ -27,8 +27,10 @@ V0 = 1000
 r = 0.00019822675964520364
 ##############################################################################
 
+market = ceu.BinomialMarket(p, u, d, r, T, epsilon)
+
 # Optimal final wealth with non-linear programming
-V_opt, CEU_opt = ceu.CEU_port_nonlin(p, V0, u, d, r, gamma, epsilon, T)
+V_opt, CEU_opt = ceu.CEU_port_nonlin(market, V0, gamma=gamma)
 
 print('*** NON-LINEAR PROGRAMMING SOLUTION ***')
 print('*** Optimal final wealth (as a function of the number k of "up" moves) ***')
@@ -38,7 +40,7 @@ print('CEU_opt:', CEU_opt)
 
 print()
 # Optimal final wealth with combinatorial optimization
-V_opt, CEU_opt = ceu.CEU_port_comb(p, V0, u, d, r, gamma, epsilon, T)
+V_opt, CEU_opt = ceu.CEU_port_comb(market, V0, gamma=gamma)
 
 print('*** COMBINATORIAL OPTIMIZATION SOLUTION ***')
 print('*** Optimal final wealth (as a function of the number k of "up" moves) ***')
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Portfolio optimization code for the paper:
+
+D. Petturiti and B. Vantaggi. 
+The impact of ambiguity on dynamic portfolio selection in the 
+epsilon-contaminated binomial market model. 
+European Journal of Operational Research, 314(3):1029–1039, 2024.
+"""
+"""
+EXPLANATION OF THE CODE:
+Simulates the realised final wealth of the optimal portfolio for the market
+calibrated META stock when the true probability of an "up" move differs from
+the calibrated p.
+"""
+import CEU_portfolio as ceu
+import CEU_simulation as sim
+
+##############################################################################
+# Calibrated data on META stock
+T = 5
+epsilon = 0.02
+p = 0.5528455284552846
+u = 1.0291516607967388
+d = 0.9716740866218196
+gamma = 2
+V0 = 1000
+r = 0.00019822675964520364
+##############################################################################
+# Simulation parameters
+Probs = [0.45, 0.5, p, 0.6, 0.65]
+n_paths = 10000000
+seed = 2024
+processes = 4
+##############################################################################
+
+if __name__ == '__main__':
+    # Optimal final wealth
+    V_opt, CEU_opt = ceu.CEU_port_dual(p, V0, u, d, r, gamma, epsilon, T)
+    print('CEU_opt:', CEU_opt)
+
+    stats = sim.simulate_wealth(V_opt, Probs, gamma, epsilon, n_paths, seed=seed, processes=processes)
+
+    for p_true in Probs:
+        print()
+        print('*** p_true = {:.4f} ***'.format(p_true))
+        print('Mean final wealth: {:.4f}'.format(stats[p_true]['mean']))
+        print('Std final wealth: {:.4f}'.format(stats[p_true]['std']))
+        for a, v in stats[p_true]['quantiles'].items():
+            print('Quantile', a, ': {:.4f}'.format(v))
+        print('EU:', stats[p_true]['EU'])
+        print('CEU:', stats[p_true]['CEU'])
@@ -20,10 +20,10 @@ from matplotlib.ticker import MaxNLocator
 from matplotlib import cm
 
 # Compute the epsilon_star threshold
-def epsilon_star(p, V0, u, d, r, gamma, T):
+def epsilon_star(market, V0, gamma):
     best_CEU = -100000
     for e in range(0, 100):
-        CEU = ceu.CEU_port_nonlin(p, V0, u, d, r, gamma, e / 100.00, T)[1]
+        CEU = ceu.CEU_port_nonlin(market, V0, gamma=gamma, epsilon=e / 100.00)[1]
         if abs(CEU - best_CEU) < 0.0000001:
             return e / 100.00
         best_CEU = CEU
@@ -52,7 +52,8 @@ for g in Gammas:
             print()
             print('p = ', p)
             for T in Times:
-                e = epsilon_star(p, V0, u, 1/u, r, g, T)
+                market = ceu.BinomialMarket(p, u, 1/u, r, T)
+                e = epsilon_star(market, V0, g)
                 e_star.append(e)
                 print('T = ', T, 'epsilon_* = ', e)
                 x.append(p)
@@ -60,12 +61,12 @@ for g in Gammas:
                 z.append(e)
                 
         # Add the singular line obtained for q = p
-        q = (1 + r - (1 / u)) / (u -  (1 / u))
         for T in Times:
-            e = 0
+            market_q = market.horizon(T).neutral()
+            e = ceu.epsilon_riskless(market_q)
             e_star.append(e)
             print('T = ', T, 'epsilon_* = ', e)
-            x.append(q)
+            x.append(market_q.p)
             y.append(T)
             z.append(e)
         Xs = np.array(x)
@@ -20,10 +20,10 @@ from matplotlib.ticker import MaxNLocator
 from matplotlib import cm
 
 # Compute the epsilon_star threshold
-def epsilon_star(p, V0, u, d, r, gamma, T):
+def epsilon_star(market, V0, gamma):
     best_CEU = -100000
     for e in range(0, 100):
-        CEU = ceu.CEU_port_nonlin(p, V0, u, d, r, gamma, e / 100.00, T)[1]
+        CEU = ceu.CEU_port_nonlin(market, V0, gamma=gamma, epsilon=e / 100.00)[1]
         if abs(CEU - best_CEU) < 0.0000001:
             return e / 100.00
         best_CEU = CEU
@@ -47,13 +47,15 @@ for g in Gammas:
         x = []
         y = []
         z = []
+        markets = {}
         print('u = ', u)
         for p in Probs:
             e_star = []
             print()
             print('p = ', p)
             for r in Rs:
-                e = epsilon_star(p, V0, u, 1/u, r, g, T)
+                markets[r] = ceu.BinomialMarket(p, u, 1/u, r, T)
+                e = epsilon_star(markets[r], V0, g)
                 e_star.append(e)
                 print('r = ', r, 'epsilon_* = ', e)
                 x.append(p)
@@ -63,12 +65,12 @@ for g in Gammas:
         # Adds the singular line
         print('Singular line:')
         for r in Rs:
-            q = (1 + r - (1 / u)) / (u -  (1 / u))
-            print('r = ', r, ' q = ', q)
-            e = 0
+            market_q = markets[r].neutral()
+            print('r = ', r, ' q = ', market_q.p)
+            e = ceu.epsilon_riskless(market_q)
             e_star.append(e)
             print('r = ', r, 'epsilon_* = ', e)
-            x.append(q)
+            x.append(market_q.p)
             y.append(r)
             z.append(e)
             
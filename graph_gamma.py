@@ -26,16 +26,15 @@ S0 = 100
 p = 0.8
 epsilon = 1 / 50
 r = 0.05
-q = ((1 + r) - d) / (u - d)
 gamma = 1
 V0 = 100
 ############################################################################## 
 
 
-def epsilon_star(p, q, V0, u, d, r, gamma, T):
+def epsilon_star(market, V0, gamma):
     best_CEU = -100000
     for e in range(0, 100):
-        CEU = ceu.CEU_port_comb(p, V0, u, d, r, gamma, e / 100.00, T)[1]
+        CEU = ceu.CEU_port_comb(market, V0, gamma=gamma, epsilon=e / 100.00)[1]
         if abs(CEU - best_CEU) < 0.0000001:
             return e / 100.00
         best_CEU = CEU
@@ -56,8 +55,9 @@ plt.title('$\epsilon^*$ ($V_0$='+str(V0)+', $u=$'+str(u)+', $d=$'+str(d)+', $r=$
 for T in Times:
     print('*** T =', T, '***')
     e_star = []
+    market = ceu.BinomialMarket(p, u, d, r, T)
     for g in Gammas:
-        e = epsilon_star(p, q, V0, u, d, r, g, T)
+        e = epsilon_star(market, V0, g)
         e_star.append(e)
         print('Gamma = g', g, 'epsilon_* = ', e)
     
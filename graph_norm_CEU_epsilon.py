@@ -41,8 +41,9 @@ for t in T:
         epsilon.append(current)
         current += 0.01
     opt_val = []
+    market = ceu.BinomialMarket(p, u, d, r, t)
     for e in epsilon:
-        opt_val.append(ceu.CEU_port_nonlin(p, V0, u, d, r, gamma, e, t)[1])
+        opt_val.append(ceu.CEU_port_nonlin(market, V0, gamma=gamma, epsilon=e)[1])
     x = np.array(epsilon)
     y = np.array(opt_val)
     y = (y - y.min()) / (y.max() - y.min())
@@ -25,10 +25,10 @@ u = 2
 d = 0.5
 ############################################################################## 
 
-def epsilon_star(p, V0, u, d, r, gamma, T):
+def epsilon_star(market, V0, gamma):
     best_CEU = -100000
     for e in range(0, 100):
-        CEU = ceu.CEU_port_nonlin(p, V0, u, d, r, gamma, e / 100.00, T)[1]
+        CEU = ceu.CEU_port_nonlin(market, V0, gamma=gamma, epsilon=e / 100.00)[1]
         if abs(CEU - best_CEU) < 0.0000001:
             return e / 100.00
         best_CEU = CEU
@@ -52,7 +52,7 @@ for p in Probs:
     print()
     print('p = ', p)
     for T in Times:
-        e = epsilon_star(q + p, V0, u, d, r, gamma, T)
+        e = epsilon_star(ceu.BinomialMarket(q + p, u, d, r, T), V0, gamma)
         e_star.append(e)
         print('T = ', T, 'epsilon_* = ', e)
     if p > 0: